@@ -1,13 +1,65 @@
 #!/usr/bin/python3 -u
 
 from abc import ABC, abstractmethod
-import csv
-import datetime
+import argparse
+import asyncio
+import atexit
 import glob
 import logging
 import os
-import smbus
+import queue
+import signal
+import smbus2
+import struct
+import threading
 import time
+import typing
+
+# All of the I2C sensors share /dev/i2c-1, and smbus transactions are not
+# re-entrant, so concurrent reads must take this lock first.
+i2c_bus_lock = threading.Lock()
+
+def i2c_read(bus, addr: int, reg: int, length: int) -> bytes:
+    """
+    Read `length` bytes starting at `reg` as a single combined
+    write-then-read transfer (repeated START instead of a STOP between the
+    register select and the data read), so the bus is held for one
+    transaction instead of two.
+    """
+    write_msg = smbus2.i2c_msg.write(addr, [reg])
+    read_msg = smbus2.i2c_msg.read(addr, length)
+    with i2c_bus_lock:
+        bus.i2c_rdwr(write_msg, read_msg)
+    return bytes(read_msg.buf[:length])
+
+def read_be16(bus, addr: int, reg: int) -> int:
+    """
+    Read a big-endian u16 from `reg` in one combined transfer. Both ADC
+    style sensors (sms, als) return exactly two bytes, MSB first, and
+    int.from_bytes does the byte assembly in C.
+    """
+    return int.from_bytes(i2c_read(bus, addr, reg, 2), "big")
+
+# Binary log record: little-endian epoch timestamp, then the readings in
+# csv column order. Soil moisture is an int32 because the 99999 error
+# sentinel doesn't fit in 16 bits. 32 bytes per record vs ~190 of csv
+# text, which matters over years of appends to an SD card.
+BCSV_RECORD = struct.Struct("<dffffif")
+
+# One-time header so the file is self-describing: magic+version, then the
+# struct format and field names.
+BCSV_HEADER = (b"BCSV1\n"
+               b"<dffffif:timestamp_epoch,cpu_temperature_f,"
+               b"ambient_temperature_f,ambient_humidity_pct,"
+               b"soil_temperature_f,soil_moisture,ambient_light_lx\n")
+
+# The csv row schema is fixed at 19 fields; the static labels/units live
+# here so the main loop only supplies the measured values. Rows end in
+# CRLF to match csv.writer's default lineterminator, which the old
+# writerow-based code used, so appended files stay self-consistent.
+CSV_ROW_TEMPLATE = ("%s,CPU Temperature,%.1f,F,Ambient Temperature,%.1f,F,"
+                    "Ambient Humidity,%.1f,%%,Soil Temperature,%.1f,F,"
+                    "Soil Moisture Value,%s,decimal_value,Ambient Light,%.1f,lx\r\n")
 
 def c_to_f(c: float) -> float:
     """
@@ -33,12 +85,14 @@ class cpu_temp(sensor):
     """
 
     def __init__(self):
-        self.cpu_temp_file = "/sys/class/thermal/thermal_zone0/temp"
+        # Hold the file open for the life of the process. pread() at offset
+        # 0 returns a fresh value from sysfs each call, without redoing the
+        # path walk that open() costs.
+        self.fd = os.open("/sys/class/thermal/thermal_zone0/temp", os.O_RDONLY)
+        atexit.register(os.close, self.fd)
 
     def read(self) -> float:
-        with open(self.cpu_temp_file) as cpu_temp_file:
-            val = c_to_f(int(cpu_temp_file.read()) / 1000.0)
-        return val
+        return c_to_f(int(os.pread(self.fd, 16, 0)) / 1000.0)
 
     def get_value(self) -> float:
         try:
@@ -48,26 +102,43 @@ class cpu_temp(sensor):
             return 99999.9
 
 
+class aths_reading(typing.NamedTuple):
+    """
+    One ambient temperature/humidity sample. A tuple rather than a dict:
+    no per-read key hashing or bucket storage, and downstream access is a
+    plain attribute lookup.
+    """
+    temperature: float
+    humidity: float
+
 class aths(sensor):
     """
     Ambient Temperature/Humidity Sensor. Underlying sensor is the SHT30
     temperature and humidity sensor. Connected via I2C.
     """
 
-    def __init__(self):
-        self.i2cbus = smbus.SMBus(1)
+    def __init__(self, bus: smbus2.SMBus):
+        self.i2cbus = bus
 
         # addr bit is pulled to ground.
         self.i2caddr = 0x44
 
         # Set the sensor for high repeatability and 10 measurements per
         # second. Kinda overkill, but we aren't on battery power.
-        self.i2cbus.write_byte_data(self.i2caddr, 0x27, 0x37)
+        with i2c_bus_lock:
+            self.i2cbus.write_byte_data(self.i2caddr, 0x27, 0x37)
 
         self.temperature_trim = 0.0
         self.humidity_trim = 0.0
 
-    def read(self) -> dict:
+        # Fold each conversion formula (including trim) into one scale and
+        # one offset, so read() is a multiply+add per value with no divide.
+        self.temperature_scale  = 315.0 / 0xFFFF
+        self.temperature_offset = -49.0 + self.temperature_trim
+        self.humidity_scale  = 100.0 / 0xFFFF
+        self.humidity_offset = self.humidity_trim
+
+    def read(self) -> aths_reading:
         # Sensor readings are 6 bytes:
         #   0 : MSB of temp reading
         #   1 : LSB of temp reading
@@ -75,25 +146,22 @@ class aths(sensor):
         #   3 : MSB of humidity reading
         #   4 : LSB of humidity reading
         #   5 : CRC of humidity reading (ignored)
-        data = self.i2cbus.read_i2c_block_data(self.i2caddr, 0x00, 6)
+        data = i2c_read(self.i2cbus, self.i2caddr, 0x00, 6)
         temperature_raw = data[0] << 8 | data[1]
         humidity_raw    = data[3] << 8 | data[4]
 
         # Apply conversion formulas to raw values.
-        temperature_f    = ((temperature_raw * 315.0) / 0xFFFF) - 49 + self.temperature_trim
-        humidity_percent = ((humidity_raw    * 100.0) / 0xFFFF) + self.humidity_trim
+        temperature_f    = temperature_raw * self.temperature_scale + self.temperature_offset
+        humidity_percent = humidity_raw    * self.humidity_scale    + self.humidity_offset
 
-        vals = dict();
-        vals["temperature"] = temperature_f
-        vals["humidity"] = humidity_percent
-        return vals
+        return aths_reading(temperature_f, humidity_percent)
 
-    def get_value(self) -> dict:
+    def get_value(self) -> aths_reading:
         try:
             return self.read()
         except:
             logging.exception(f"Failure to read Ambient Temperature/Humidity Sensor")
-            return { "temperature": 9999.9, "humidity": 9999.9 }
+            return aths_reading(9999.9, 9999.9)
 
 class sts(sensor):
     """
@@ -102,32 +170,104 @@ class sts(sensor):
     """
 
     def __init__(self):
-        # Device will appear at "/sys/bus/w1/devices/28-xxxxxxxxxxxx/w1_slave".
-        base_dir = '/sys/bus/w1/devices/'
-        device_folder = glob.glob(base_dir + '28*')[0]
-        self.device_file = device_folder + '/w1_slave'
+        self.path_cache_file = os.path.expanduser('~/.gardenmon/ds18b20_path')
+
+        self.device_file = self._find_device()
+
+        # As with cpu_temp, hold the device file open and pread() it. The
+        # fd can be replaced on reconnect, so close whatever is current at
+        # exit.
+        self.fd = os.open(self.device_file, os.O_RDONLY)
+        atexit.register(lambda: os.close(self.fd))
+
+        # Writing "trigger" here kicks off a conversion on every sensor on
+        # the bus without blocking until it completes.
+        self.bulk_read_file = '/sys/bus/w1/devices/w1_bus_master1/therm_bulk_read'
+
+        # Worst-case conversion time at 12-bit resolution.
+        self.conversion_time_s = 0.75
 
         self.temperature_trim = -2.2
 
-    def read(self) -> float:
-        with open(self.device_file, 'r') as device_file:
-            lines = device_file.readlines()
+        # The raw reading is Celsius * 1000; fold the /1000, the C-to-F
+        # conversion, and the trim into one scale and one offset.
+        self.w1_scale = 0.001 * 1.8
+        self.w1_offset = 32.0 + self.temperature_trim
+
+    def _find_device(self) -> str:
+        """
+        Device will appear at "/sys/bus/w1/devices/28-xxxxxxxxxxxx/w1_slave".
+        The enumerated path is stable across restarts, so cache it in a
+        dotfile and only fall back to a full sysfs scan when the cached
+        path is missing or stale.
+        """
+        try:
+            with open(self.path_cache_file) as cache_file:
+                device_file = cache_file.read().strip()
+            if os.path.exists(device_file):
+                return device_file
+        except OSError:
+            pass
+
+        device_folder = glob.glob('/sys/bus/w1/devices/28*')[0]
+        device_file = device_folder + '/w1_slave'
+
+        os.makedirs(os.path.dirname(self.path_cache_file), exist_ok=True)
+        with open(self.path_cache_file, 'w') as cache_file:
+            cache_file.write(device_file)
+
+        return device_file
+
+    def _reconnect(self):
+        # The sensor dropped off the bus (or re-enumerated with a new id);
+        # invalidate the cached path and scan again.
+        try:
+            os.remove(self.path_cache_file)
+        except OSError:
+            pass
+        os.close(self.fd)
+        self.device_file = self._find_device()
+        self.fd = os.open(self.device_file, os.O_RDONLY)
+
+    def start(self):
+        """
+        Kick off a temperature conversion. The result can be collected with
+        read_result() after conversion_time_s has elapsed. If the trigger
+        fails, read_result() falls back to the kernel's blocking conversion.
+        """
+        try:
+            with open(self.bulk_read_file, 'w') as bulk_read_file:
+                bulk_read_file.write('trigger')
+        except:
+            logging.exception(f"Failure to trigger Soil Temperature conversion")
+
+    def read_result(self) -> float:
+        try:
+            raw = os.pread(self.fd, 128, 0)
+        except OSError:
+            self._reconnect()
+            raw = os.pread(self.fd, 128, 0)
+
+        lines = raw.decode().splitlines()
 
         if "YES" not in lines[0] and "t=" not in lines[1]:
             raise RuntimeError("Invalid reading from Soil Temperature Reading")
 
         # The end of the second line has "t=X", where X is the temperature
         # reading in Celsius * 1000.
-        temperature_string = lines[1][lines[1].find("t=") + 2:]
-        temperature_f = c_to_f(float(temperature_string) / 1000.0)
-        return temperature_f + self.temperature_trim
+        return float(lines[1].rpartition("t=")[2]) * self.w1_scale + self.w1_offset
+
+    def read(self) -> float:
+        self.start()
+        time.sleep(self.conversion_time_s)
+        return self.read_result()
 
     def get_value(self) -> float:
         try:
             # If the sensor is disconnected from the 1wire connection to the
             # board this will read 0, without any way to really detect the
             # error condition.
-            return self.read()
+            return self.read_result()
         except:
             logging.exception(f"Failure to read Soil Temperature Sensor")
             return 99999.9
@@ -138,8 +278,8 @@ class sms(sensor):
     the output fed into an MCP3221 ADC. Connected via I2C.
     """
 
-    def __init__(self):
-        self.i2cbus = smbus.SMBus(1)
+    def __init__(self, bus: smbus2.SMBus):
+        self.i2cbus = bus
 
         # Address of the A5 variant of the MCP3221.
         self.i2caddr = 0x4d
@@ -147,15 +287,9 @@ class sms(sensor):
         self.value_trim = 0
 
     def read(self) -> int:
-        # Read fake "register" 0x00, get back 2 bytes:
-        #   0 : MSB of ADC reading
-        #   1 : LSB of ADC reading
-        data = self.i2cbus.read_i2c_block_data(self.i2caddr, 0x00, 2)
-        val = data[0] << 8 | data[1]
-
-        val += self.value_trim
-
-        return val
+        # Read fake "register" 0x00, get back the 12-bit ADC reading as a
+        # big-endian u16.
+        return read_be16(self.i2cbus, self.i2caddr, 0x00) + self.value_trim
 
     def get_value(self) -> int:
         try:
@@ -170,19 +304,21 @@ class als(sensor):
     via I2C.
     """
 
-    def __init__(self):
-        self.i2cbus = smbus.SMBus(1)
+    def __init__(self, bus: smbus2.SMBus):
+        self.i2cbus = bus
         self.i2caddr = 0x23
 
         self.lux_trim = 0.0
 
+        # Per the datasheet, raw counts divide by 1.2 to give lux.
+        # Precompute the reciprocal so read() multiplies instead.
+        self.lux_scale = 1.0 / 1.2
+
     def read(self) -> float:
-        # From register 0x10, sensor readings are 2 bytes:
-        #   0 : MSB of lux reading
-        #   1 : LSB of lux reading
-        data = self.i2cbus.read_i2c_block_data(self.i2caddr, 0x10, 2)
-        val = data[0] << 8 | data[1]
-        lux = float(val)/1.2 + self.lux_trim
+        # From register 0x10, the lux reading comes back as a big-endian
+        # u16.
+        val = read_be16(self.i2cbus, self.i2caddr, 0x10)
+        lux = val * self.lux_scale + self.lux_trim
         return lux
 
     def get_value(self) -> float:
@@ -192,54 +328,298 @@ class als(sensor):
             logging.exception(f"Failure to read Ambient Light Sensor")
             return 99999.9
 
-def gardenmon_main():
-    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
+class cached_sensor(sensor):
+    """
+    Wrap a sensor with a time-to-live. Within ttl_s of the last successful
+    read get_value() returns the cached value without touching the
+    hardware, so slow-changing quantities (soil temperature/moisture)
+    don't need to be re-read every cycle.
+    """
 
-    log_folder = '/var/log/gardenmon'
-    if not os.path.exists(log_folder):
-        os.makedirs(log_folder)
+    def __init__(self, inner: sensor, ttl_s: float):
+        self.inner = inner
+        self.ttl_s = ttl_s
+        self.last_value = None
+        self.last_read = float('-inf')
 
-    cpu_temp_sensor = cpu_temp()
-    aths_sensor = aths()
-    sts_sensor = sts()
-    sms_sensor = sms()
-    als_sensor = als()
+    def is_stale(self) -> bool:
+        return time.monotonic() - self.last_read >= self.ttl_s
 
-    time.sleep(1)
+    def read(self):
+        return self.inner.read()
 
-    logging.info("gardenmon starting...")
+    def get_value(self):
+        if self.is_stale():
+            self.last_value = self.inner.get_value()
+            self.last_read = time.monotonic()
+        return self.last_value
 
-    while True:
-        current_time = datetime.datetime.now()
+class adaptive_cached_sensor(cached_sensor):
+    """
+    cached_sensor variant for numeric readings that sit still for long
+    stretches. While consecutive readings stay inside a deadband the ttl
+    doubles (up to max_ttl_s); a reading outside the window snaps the
+    cadence back to the base ttl. This is the software stand-in for a
+    comparator ALERT pin: the MCP3221 has no threshold registers or
+    interrupt line, so "only sample when it's changing" has to be
+    approximated from the readings themselves.
+    """
 
-        timestamp = current_time.strftime('%Y-%m-%d %H:%M:%S')
-        row = [timestamp]
+    def __init__(self, inner: sensor, ttl_s: float, deadband: float,
+                 max_ttl_s: float):
+        super().__init__(inner, ttl_s)
+        self.base_ttl_s = ttl_s
+        self.deadband = deadband
+        self.max_ttl_s = max_ttl_s
+
+    def get_value(self):
+        if self.is_stale():
+            previous = self.last_value
+            value = self.inner.get_value()
+            if previous is not None and abs(value - previous) <= self.deadband:
+                self.ttl_s = min(self.ttl_s * 2, self.max_ttl_s)
+            else:
+                self.ttl_s = self.base_ttl_s
+            self.last_value = value
+            self.last_read = time.monotonic()
+        return self.last_value
+
+class log_writer:
+    """
+    Write-behind buffer for the logs. Rows arrive as packed binary records
+    (plus, with legacy_csv, fully formatted csv lines), accumulate in
+    memory, and get flushed in batches, so the files see a couple of
+    writes per minute instead of open/write/close cycles per second
+    (which matters for SD card wear as much as for speed). The binary
+    main.bcsv is the primary sink; none of the csv fields ever contain
+    commas or quotes, so there is no need for csv.writer's escaping
+    machinery on the legacy path.
+    """
 
-        cpu_temp_val = cpu_temp_sensor.get_value()
-        row.extend(["CPU Temperature", f"{cpu_temp_val:0.1f}", "F"])
+    def __init__(self, log_folder: str, legacy_csv: bool = False,
+                 batch_size: int = 30, flush_interval_s: float = 30.0):
+        self.log_folder = log_folder
+        self.legacy_csv = legacy_csv
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+
+        self.records = []
+        self.lines = []
+        self.last_flush = time.monotonic()
+
+        # 64KB buffers so even a full batch coalesces into one write.
+        bcsv_path = f"{log_folder}/main.bcsv"
+        new_bcsv = not os.path.exists(bcsv_path) or os.path.getsize(bcsv_path) == 0
+        self.bcsv_file = open(bcsv_path, "ab", buffering=65536)
+        if new_bcsv:
+            self.bcsv_file.write(BCSV_HEADER)
+
+        if self.legacy_csv:
+            self.main_file = open(f"{log_folder}/main.csv", "a", buffering=65536, newline="")
+            self.daily_date = time.strftime('%Y-%m-%d')
+            self.daily_file = self._open_daily_file()
+
+    def _open_daily_file(self):
+        return open(f"{self.log_folder}/{self.daily_date}.csv", "a", buffering=65536, newline="")
+
+    def push(self, record: bytes, line: str, current_date: str):
+        if self.legacy_csv and current_date != self.daily_date:
+            # Pending rows belong to the old date, so flush them into the
+            # old per-day file before rolling over.
+            self.flush()
+            self.daily_file.close()
+            self.daily_date = current_date
+            self.daily_file = self._open_daily_file()
+
+        self.records.append(record)
+        if self.legacy_csv:
+            self.lines.append(line)
+
+        if len(self.records) >= self.batch_size or \
+           time.monotonic() - self.last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self):
+        self.bcsv_file.write(b''.join(self.records))
+        self.records.clear()
+        self.bcsv_file.flush()
+
+        if self.legacy_csv:
+            data = ''.join(self.lines)
+            self.lines.clear()
+            self.main_file.write(data)
+            self.daily_file.write(data)
+            self.main_file.flush()
+            self.daily_file.flush()
+
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        # Idempotent: called on the shutdown path and again via atexit.
+        if self.bcsv_file.closed:
+            return
+        self.flush()
+        self.bcsv_file.close()
+        if self.legacy_csv:
+            self.main_file.close()
+            self.daily_file.close()
+
+def log_writer_thread(writer: log_writer, log_queue: queue.Queue):
+    """
+    Drain (record, line, date) entries from log_queue into the
+    log_writer. Runs on a dedicated thread so a slow flush (SD card
+    stall, fsync) never delays the sampling loop.
+    """
+    while True:
+        entry = log_queue.get()
+        try:
+            writer.push(*entry)
+        except:
+            # Losing one row beats silently killing the writer thread on
+            # a transient I/O error (full disk, flaky SD card).
+            logging.exception(f"Failure to write log entry")
+        finally:
+            log_queue.task_done()
 
-        aths_vals = aths_sensor.get_value()
-        row.extend(["Ambient Temperature", f"{aths_vals['temperature']:0.1f}", "F"])
-        row.extend(["Ambient Humidity",    f"{aths_vals['humidity']:0.1f}",    "%"])
+async def gardenmon_main(legacy_csv: bool = False):
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
 
-        sts_temperature = sts_sensor.get_value()
-        row.extend(["Soil Temperature", f"{sts_temperature:0.1f}", "F"])
+    log_folder = '/var/log/gardenmon'
+    if not os.path.exists(log_folder):
+        os.makedirs(log_folder)
 
-        sms_val = sms_sensor.get_value()
-        row.extend(["Soil Moisture Value", f"{sms_val}", "decimal_value"])
+    # One shared bus object, so /dev/i2c-1 is only opened once.
+    i2c_bus = smbus2.SMBus(1)
 
-        als_val = als_sensor.get_value()
-        row.extend(["Ambient Light", f"{als_val:0.1f}", "lx"])
+    cpu_temp_sensor = cpu_temp()
+    aths_sensor = aths(i2c_bus)
+    sts_sensor = sts()
+    sms_sensor = sms(i2c_bus)
+    als_sensor = als(i2c_bus)
+
+    # Soil conditions change on a minutes-to-hours timescale, so sampling
+    # them every second is wasted I/O (and the DS18B20 conversion is the
+    # slowest operation in the loop). CPU temp and ambient temp/humidity
+    # stay at 1 Hz.
+    sts_cached = cached_sensor(sts_sensor, ttl_s=30.0)
+    als_cached = cached_sensor(als_sensor, ttl_s=5.0)
+
+    # Soil moisture barely moves between waterings; while readings stay
+    # within ~50 ADC counts of each other, back the sampling off to once
+    # a minute.
+    sms_cached = adaptive_cached_sensor(sms_sensor, ttl_s=5.0, deadband=50,
+                                        max_ttl_s=60.0)
+
+    writer = log_writer(log_folder, legacy_csv=legacy_csv)
+
+    # Bounded so a wedged filesystem can't grow the backlog without limit;
+    # at one row per second, 1000 entries is ~17 minutes of data.
+    log_queue = queue.Queue(maxsize=1000)
+    threading.Thread(target=log_writer_thread, args=(writer, log_queue),
+                     daemon=True).start()
+
+    loop = asyncio.get_running_loop()
+
+    # With rows buffered in memory, an unhandled SIGTERM from systemd
+    # would drop up to a batch of data. Stop the loop cleanly instead and
+    # flush everything on the way out.
+    stop_event = asyncio.Event()
+    loop.add_signal_handler(signal.SIGTERM, stop_event.set)
+    loop.add_signal_handler(signal.SIGINT, stop_event.set)
+    atexit.register(writer.close)
+
+    async def read_soil_temperature() -> float:
+        # Inside the ttl just hand back the cached value; otherwise
+        # trigger a conversion and spend the wait in asyncio.sleep so the
+        # I2C and sysfs reads proceed in the meantime.
+        if not sts_cached.is_stale():
+            return sts_cached.get_value()
+        await loop.run_in_executor(None, sts_sensor.start)
+        await asyncio.sleep(sts_sensor.conversion_time_s)
+        return await loop.run_in_executor(None, sts_cached.get_value)
+
+    await asyncio.sleep(1)
 
-        with open(f"{log_folder}/main.csv", "a") as csvfile:
-            csvwriter = csv.writer(csvfile, delimiter=',')
-            csvwriter.writerow(row)
+    logging.info("gardenmon starting...")
 
-        with open(f"{log_folder}/{current_time.date()}.csv", "a") as csvfile:
-            csvwriter = csv.writer(csvfile, delimiter=',')
-            csvwriter.writerow(row)
+    # Schedule against absolute deadlines on the monotonic clock so the
+    # cadence doesn't drift by however long each iteration takes.
+    sample_interval_s = 1.0
+    next_deadline = loop.time() + sample_interval_s
+
+    while not stop_event.is_set():
+        # time.strftime is noticeably cheaper than building a datetime and
+        # strftime-ing it, and the first 10 characters double as the
+        # per-day file key.
+        now = time.time()
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+
+        # The sensor reads are all I/O bound (sysfs, I2C, 1wire), so run
+        # them concurrently in executor threads. Each cycle then takes as
+        # long as the slowest sensor, not the sum of all of them.
+        cpu_temp_val, aths_vals, sts_temperature, sms_val, als_val = \
+            await asyncio.gather(
+                loop.run_in_executor(None, cpu_temp_sensor.get_value),
+                loop.run_in_executor(None, aths_sensor.get_value),
+                read_soil_temperature(),
+                loop.run_in_executor(None, sms_cached.get_value),
+                loop.run_in_executor(None, als_cached.get_value),
+            )
+
+        record = BCSV_RECORD.pack(now, cpu_temp_val,
+                                  aths_vals.temperature,
+                                  aths_vals.humidity,
+                                  sts_temperature, sms_val, als_val)
+
+        # The csv schema is fixed and no field can contain a comma or
+        # quote, so fill the module-level template directly rather than
+        # building a row list and paying for csv.writer's generic
+        # escaping.
+        if legacy_csv:
+            line = CSV_ROW_TEMPLATE % (timestamp, cpu_temp_val,
+                                       aths_vals.temperature,
+                                       aths_vals.humidity,
+                                       sts_temperature, sms_val, als_val)
+        else:
+            line = ""
 
-        time.sleep(1)
+        try:
+            log_queue.put_nowait((record, line, timestamp[:10]))
+        except queue.Full:
+            # Prefer fresh data: drop the oldest queued line to make room.
+            # The dropped entry still needs task_done(), or join() on the
+            # shutdown path would wait forever.
+            try:
+                log_queue.get_nowait()
+                log_queue.task_done()
+            except queue.Empty:
+                pass
+            log_queue.put_nowait((record, line, timestamp[:10]))
+
+        dt = next_deadline - loop.time()
+        if dt > 0:
+            # Sleep until the deadline, but wake immediately on shutdown.
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=dt)
+            except asyncio.TimeoutError:
+                pass
+        elif dt < -sample_interval_s:
+            # More than a full interval behind; resync instead of firing a
+            # burst of back-to-back samples to catch up.
+            logging.warning(f"Sampling loop fell behind by {-dt:0.1f}s, resyncing")
+            next_deadline = loop.time()
+        next_deadline += sample_interval_s
+
+    logging.info("gardenmon stopping...")
+
+    # Let the writer thread drain whatever is queued, then flush the
+    # in-memory batch out to disk.
+    await loop.run_in_executor(None, log_queue.join)
+    writer.close()
 
 if __name__ == "__main__":
-    gardenmon_main()
+    parser = argparse.ArgumentParser(description="gardenmon data collection service")
+    parser.add_argument("--legacy-csv", action="store_true",
+                        help="also write csv logs alongside main.bcsv")
+    args = parser.parse_args()
+    asyncio.run(gardenmon_main(legacy_csv=args.legacy_csv))
@@ -22,9 +22,9 @@ git config --global credential.helper store
 # Enable serial port and enable interactive login.
 sudo raspi-config nonint do_serial 0
 
-# Install python3 and smbus library for I2C.
+# Install python3 and smbus2 library for I2C.
 sudo apt install python3 -y
-sudo apt install python3-smbus -y
+sudo apt install python3-smbus2 -y
 
 # Enable I2C.
 sudo raspi-config nonint do_i2c 0